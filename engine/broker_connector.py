@@ -3,8 +3,10 @@ Broker Connector for abstract broker interface
 Supports multiple broker APIs (Angel One, Fyers)
 """
 
+import functools
 from typing import Dict, Optional, List
 from abc import ABC, abstractmethod
+from datetime import date, datetime, time, timedelta
 import pyotp
 from logzero import logger
 try:
@@ -14,6 +16,27 @@ except ImportError:
     SmartConnect = None
 
 
+# Month codes used in NFO trading symbols and expiry dates (locale-independent, unlike %b)
+_MONTH_ABBR = ('JAN', 'FEB', 'MAR', 'APR', 'MAY', 'JUN', 'JUL', 'AUG', 'SEP', 'OCT', 'NOV', 'DEC')
+# After this time on a Tuesday, the weekly expiry rolls to the next Tuesday
+_MARKET_CLOSE = time(15, 30)
+
+
+@functools.lru_cache(maxsize=8)
+def _next_tuesday_expiry(today: date, after_close: bool) -> date:
+    """
+    Weekly expiry date (next Tuesday, or today if it is Tuesday before market close).
+    
+    Cached per (date, after_close), so it is computed at most twice a day.
+    """
+    # Tuesday is 1 (Monday=0 ... Sunday=6)
+    days_ahead = (1 - today.weekday()) % 7
+    # If today is Tuesday and time is after market close (15:30), move to next Tuesday
+    if days_ahead == 0 and after_close:
+        days_ahead = 7
+    return today + timedelta(days=days_ahead)
+
+
 class BrokerInterface(ABC):
     """
     Abstract base class for broker interfaces.
@@ -479,31 +502,17 @@ class AngelOneBroker(BrokerInterface):
         Calculate next Tuesday from today and return in DDMMMYY (e.g., 29OCT24).
         If today is Tuesday before market close, use today.
         """
-        from datetime import datetime, timedelta
         now = datetime.now()
-        weekday = now.weekday()  # Monday=0 ... Sunday=6
-        # Tuesday is 1
-        days_ahead = (1 - weekday) % 7
-        # If today is Tuesday and time is after market close (15:30), move to next Tuesday
-        market_close = now.replace(hour=15, minute=30, second=0, microsecond=0)
-        if days_ahead == 0 and now > market_close:
-            days_ahead = 7
-        next_tuesday = now + timedelta(days=days_ahead)
-        return next_tuesday.strftime('%d%b%y').upper()
+        expiry = _next_tuesday_expiry(now.date(), now.time() > _MARKET_CLOSE)
+        return f"{expiry.day:02d}{_MONTH_ABBR[expiry.month - 1]}{expiry.year % 100:02d}"
 
     def _get_next_tuesday_expiry_ddmmmyyyy(self) -> str:
         """
         Calculate next Tuesday from today and return in DDMMMYYYY (e.g., 29OCT2024) for APIs like optionGreek.
         """
-        from datetime import datetime, timedelta
         now = datetime.now()
-        weekday = now.weekday()
-        days_ahead = (1 - weekday) % 7
-        market_close = now.replace(hour=15, minute=30, second=0, microsecond=0)
-        if days_ahead == 0 and now > market_close:
-            days_ahead = 7
-        next_tuesday = now + timedelta(days=days_ahead)
-        return next_tuesday.strftime('%d%b%Y').upper()
+        expiry = _next_tuesday_expiry(now.date(), now.time() > _MARKET_CLOSE)
+        return f"{expiry.day:02d}{_MONTH_ABBR[expiry.month - 1]}{expiry.year}"
 
     def get_option_greeks(self, underlying: str, expiry_date: Optional[str] = None) -> List[Dict]:
         """
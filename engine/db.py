@@ -4,7 +4,7 @@ import os
 from typing import Generator, Optional
 
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base, Session
+from sqlalchemy.orm import sessionmaker, scoped_session, declarative_base, Session
 
 
 Base = declarative_base()
@@ -55,6 +55,10 @@ engine = create_engine(_DATABASE_URL, pool_pre_ping=True, future=True)
 
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, expire_on_commit=False, future=True)
 
+# Thread-local session registry for non-request code paths (e.g. trade logging).
+# Call ScopedSession() to get the current thread's session and ScopedSession.remove() when done.
+ScopedSession = scoped_session(SessionLocal)
+
 
 def get_session() -> Generator[Session, None, None]:
     """
@@ -5,12 +5,13 @@ Position monitoring and risk management (SL/TP, trailing, profit booking)
 import threading
 import time
 from dataclasses import dataclass
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime
+import numpy as np
 from logzero import logger
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class PositionRules:
     sl_points: int
     trail_points: int
@@ -46,9 +47,12 @@ class PositionMonitor:
         self.rules = rules
         self.order_id = order_id
 
-        # Derived levels
+        # Derived levels (fixed for the life of the position, so computed once here)
         self.stop_loss = self.entry_price - self.rules.sl_points
         self.trail_anchor = self.entry_price
+        self.book1_target = self.entry_price + self.rules.book1_points
+        self.book2_target = self.entry_price + self.rules.book2_points
+        self.book1_qty = int(round(self.total_qty * self.rules.book1_ratio))
         self.book1_done = False
         self.book2_done = False
 
@@ -113,23 +117,23 @@ class PositionMonitor:
         self.last_quote_time = datetime.now()
 
         # Update trailing SL if price advances beyond anchor by trail_points
-        if ltp - self.trail_anchor >= self.rules.trail_points:
-            increments = int((ltp - self.trail_anchor) // self.rules.trail_points)
-            if increments > 0:
-                self.trail_anchor += increments * self.rules.trail_points
-                new_sl = self.trail_anchor - self.rules.sl_points
-                if new_sl > self.stop_loss:
-                    logger.info(f"Trailing SL raised from {self.stop_loss} to {new_sl}")
-                    self.stop_loss = new_sl
+        # (one floor-divide; whole steps >= 1 only when the advance covers trail_points)
+        trail_points = self.rules.trail_points
+        increments = (ltp - self.trail_anchor) // trail_points if trail_points > 0 else 0
+        if increments >= 1:
+            self.trail_anchor += increments * trail_points
+            new_sl = self.trail_anchor - self.rules.sl_points
+            if new_sl > self.stop_loss:
+                logger.info(f"Trailing SL raised from {self.stop_loss} to {new_sl}")
+                self.stop_loss = new_sl
 
         # Profit booking levels (point-based off entry)
-        if not self.book1_done and (ltp >= self.entry_price + self.rules.book1_points):
-            qty_to_close = int(round(self.total_qty * self.rules.book1_ratio))
-            self._book_profit(qty_to_close, level="L1")
+        if not self.book1_done and ltp >= self.book1_target:
+            self._book_profit(self.book1_qty, level="L1")
             self.book1_done = True
 
         # Full target
-        if not self.book2_done and (ltp >= self.entry_price + self.rules.book2_points):
+        if not self.book2_done and ltp >= self.book2_target:
             qty_to_close = self.remaining_qty
             self._book_profit(qty_to_close, level="L2")
             self.book2_done = True
@@ -172,3 +176,83 @@ class PositionMonitor:
                 logger.info("Position fully closed (SL)")
 
 
+class PortfolioState:
+    """
+    PositionMonitor's SL/TP, trailing and profit-booking rules for many positions at once.
+    
+    Each field is a NumPy array with one element per position, so a poll that
+    fetched LTPs for the whole book is processed in one vectorized pass instead
+    of one PositionMonitor._tick call per position. Order placement is left to
+    the caller, which acts on the events returned by tick().
+    """
+    __slots__ = (
+        'rules', 'entry_price', 'stop_loss', 'trail_anchor', 'book1_target', 'book2_target',
+        'book1_qty', 'remaining_qty', 'book1_done', 'book2_done', 'closed',
+    )
+    
+    def __init__(self, entry_prices, total_qtys, rules: PositionRules):
+        self.rules = rules
+        self.entry_price = np.asarray(entry_prices, dtype=np.float64).copy()
+        total_qty = np.asarray(total_qtys, dtype=np.int64)
+        
+        # Derived levels, as in PositionMonitor.__init__
+        self.stop_loss = self.entry_price - rules.sl_points
+        self.trail_anchor = self.entry_price.copy()
+        self.book1_target = self.entry_price + rules.book1_points
+        self.book2_target = self.entry_price + rules.book2_points
+        self.book1_qty = np.rint(total_qty * rules.book1_ratio).astype(np.int64)
+        self.remaining_qty = total_qty.copy()
+        self.book1_done = np.zeros(total_qty.shape, dtype=bool)
+        self.book2_done = np.zeros(total_qty.shape, dtype=bool)
+        self.closed = np.zeros(total_qty.shape, dtype=bool)
+    
+    def _close(self, mask: np.ndarray, qty: np.ndarray, level: str, events: List[Tuple[int, str, int]]):
+        """Reduce remaining quantity where mask is set, recording (index, level, qty) events."""
+        qty = np.minimum(qty, self.remaining_qty)
+        mask = mask & ~self.closed & (self.remaining_qty > 0) & (qty > 0)
+        if not mask.any():
+            return
+        self.remaining_qty[mask] -= qty[mask]
+        self.closed |= mask & (self.remaining_qty == 0)
+        for i in np.flatnonzero(mask).tolist():
+            events.append((i, level, int(qty[i])))
+    
+    def tick(self, ltps) -> List[Tuple[int, str, int]]:
+        """
+        Apply one poll's LTPs (one per position) to the book.
+        
+        Returns:
+            List of (position index, level, qty) closes to place, where level is
+            "L1"/"L2" for profit booking or "SL" for stop loss; same order of
+            checks as PositionMonitor._tick
+        """
+        ltp = np.asarray(ltps, dtype=np.float64)
+        rules = self.rules
+        active = ~self.closed
+        events: List[Tuple[int, str, int]] = []
+        
+        # Update trailing SL if price advances beyond anchor by trail_points
+        if rules.trail_points > 0:
+            increments = np.floor_divide(ltp - self.trail_anchor, rules.trail_points)
+            moved = np.flatnonzero(active & (increments >= 1))
+            self.trail_anchor[moved] += increments[moved] * rules.trail_points
+            new_sl = self.trail_anchor[moved] - rules.sl_points
+            raised = new_sl > self.stop_loss[moved]
+            self.stop_loss[moved[raised]] = new_sl[raised]
+            if raised.any():
+                logger.info("Trailing SL raised for %d position(s)", int(raised.sum()))
+        
+        # Profit booking levels (point-based off entry)
+        book1 = active & ~self.book1_done & (ltp >= self.book1_target)
+        self._close(book1, self.book1_qty, "L1", events)
+        self.book1_done |= book1
+        
+        # Full target
+        book2 = active & ~self.book2_done & (ltp >= self.book2_target)
+        self._close(book2, self.remaining_qty, "L2", events)
+        self.book2_done |= book2
+        
+        # Stop loss
+        self._close(active & (ltp <= self.stop_loss), self.remaining_qty, "SL", events)
+        
+        return events
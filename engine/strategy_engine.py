@@ -31,16 +31,21 @@ def detect_inside_bar(data_1h: pd.DataFrame) -> List[int]:
     
     logger.info(f"🔍 Starting Inside Bar detection scan on {len(data_1h)} 1-hour candles")
     
+    # Pull the columns out once; per-row .iloc lookups dominate the scan otherwise
+    highs = data_1h['High'].tolist()
+    lows = data_1h['Low'].tolist()
+    dates = data_1h['Date'].tolist() if 'Date' in data_1h.columns else None
+    
     for i in range(2, len(data_1h)):
         # Check if current candle is inside the previous candle (i-1)
-        current_high = data_1h['High'].iloc[i]
-        current_low = data_1h['Low'].iloc[i]
-        prev_high = data_1h['High'].iloc[i-1]
-        prev_low = data_1h['Low'].iloc[i-1]
+        current_high = highs[i]
+        current_low = lows[i]
+        prev_high = highs[i-1]
+        prev_low = lows[i-1]
         
         # Get timestamps for logging
-        current_time = data_1h['Date'].iloc[i] if 'Date' in data_1h.columns else f"Candle_{i}"
-        prev_time = data_1h['Date'].iloc[i-1] if 'Date' in data_1h.columns else f"Candle_{i-1}"
+        current_time = dates[i] if dates is not None else f"Candle_{i}"
+        prev_time = dates[i-1] if dates is not None else f"Candle_{i-1}"
         
         # Log reference candle (previous candle)
         if i == 2:
@@ -2,24 +2,227 @@
 Trade Logger for comprehensive trade logging to CSV
 """
 
+import atexit
 import csv
+import io
+import itertools
 import os
+import queue
+import threading
 from datetime import datetime
 from typing import Dict, List, Optional
 from decimal import Decimal, InvalidOperation
 
+from logzero import logger
 from sqlalchemy.exc import IntegrityError
 
-from .db import get_session, init_database
+from .db import ScopedSession, init_database
 from .models import Trade
+import numpy as np
 import pandas as pd
 
 
+# CSV column order for the trade log
+TRADE_FIELDNAMES = (
+    'timestamp', 'symbol', 'strike', 'direction', 'order_id',
+    'entry', 'sl', 'tp', 'exit', 'pnl', 'status',
+    'pre_reason', 'post_outcome', 'quantity'
+)
+# Longest the interpreter waits at exit for queued trades to reach the CSV
+EXIT_FLUSH_TIMEOUT = 5.0
+# Queued to stop the writer threads
+_STOP_WRITER = object()
+
+
+class _TradeWriter:
+    """
+    Queue, file lock and background threads shared by every TradeLogger on one CSV.
+    
+    Writers are registered by real path, so loggers created separately (main, each
+    dashboard session, the module-level default) append through one queue and one
+    lock, and a read-modify-write by any of them first flushes everyone's queued
+    rows. The CSV thread appends batches; DB persistence runs on its own thread so
+    flush() never waits on the database.
+    """
+    
+    _registry: Dict[str, "_TradeWriter"] = {}
+    _registry_lock = threading.Lock()
+    
+    def __init__(self, path: str):
+        self.path = path
+        self.file_lock = threading.Lock()
+        # Guards starting/stopping the threads and swapping the queues
+        self._state_lock = threading.Lock()
+        self._queue: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._db_queue: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._csv_thread: Optional[threading.Thread] = None
+        self._users = 0
+    
+    @classmethod
+    def acquire(cls, path: str) -> "_TradeWriter":
+        """Shared writer for path, registering one more user."""
+        key = os.path.realpath(path)
+        with cls._registry_lock:
+            writer = cls._registry.get(key)
+            if writer is None:
+                writer = cls._registry[key] = cls(path)
+            writer._users += 1
+            return writer
+    
+    def release(self, timeout: Optional[float]):
+        """Drop one user; the last one unregisters the writer and stops its threads."""
+        with self._registry_lock:
+            self._users -= 1
+            if self._users > 0:
+                return
+            key = os.path.realpath(self.path)
+            if self._registry.get(key) is self:
+                del self._registry[key]
+        self.stop(timeout)
+    
+    def submit(self, row: Dict, trade: Dict, write_db):
+        """Queue one trade, starting the threads on first use."""
+        with self._state_lock:
+            if self._csv_thread is None:
+                self._start()
+            self._queue.put((row, trade, write_db))
+    
+    def flush(self, timeout: Optional[float] = None):
+        """Block until all trades queued so far have been appended to the CSV."""
+        with self._state_lock:
+            if self._csv_thread is None:
+                return
+            done = threading.Event()
+            self._queue.put(done)
+        done.wait(timeout)
+    
+    def stop(self, timeout: Optional[float]):
+        """Write queued trades and stop the threads; a later submit() starts new ones."""
+        with self._state_lock:
+            thread = self._csv_thread
+            if thread is None:
+                return
+            self._queue.put(_STOP_WRITER)
+            thread.join(timeout)
+            # Fresh queues, so new threads never share one with a thread still draining
+            self._queue = queue.SimpleQueue()
+            self._db_queue = queue.SimpleQueue()
+            self._csv_thread = None
+            atexit.unregister(self.flush)
+    
+    def _start(self):
+        """Start the CSV and DB threads (caller holds _state_lock)."""
+        self._csv_thread = threading.Thread(
+            target=self._csv_loop, args=(self._queue, self._db_queue),
+            name="TradeLoggerWriter", daemon=True
+        )
+        db_thread = threading.Thread(
+            target=self._db_loop, args=(self._db_queue,), name="TradeLoggerDB", daemon=True
+        )
+        self._csv_thread.start()
+        db_thread.start()
+        atexit.register(self.flush, EXIT_FLUSH_TIMEOUT)
+    
+    def _csv_loop(self, trades: "queue.SimpleQueue", db_trades: "queue.SimpleQueue"):
+        """Drain the queue in batches: one CSV append per batch, then hand off to the DB thread."""
+        # Rows whose CSV append failed; retried ahead of the next batch
+        failed_rows: List[Dict] = []
+        while True:
+            batch = [trades.get()]
+            while True:
+                try:
+                    batch.append(trades.get_nowait())
+                except queue.Empty:
+                    break
+            
+            entries = [
+                item for item in batch
+                if item is not _STOP_WRITER and not isinstance(item, threading.Event)
+            ]
+            rows = failed_rows + [row for row, _, _ in entries]
+            if rows:
+                try:
+                    self.append_rows(rows)
+                    failed_rows = []
+                except Exception:
+                    logger.exception(
+                        "Error writing %d trade(s) to %s; retrying with the next batch",
+                        len(rows), self.path
+                    )
+                    failed_rows = rows
+            
+            # Release flush() waiters once everything queued before them is in the CSV
+            for item in batch:
+                if isinstance(item, threading.Event):
+                    item.set()
+            
+            if entries:
+                db_trades.put([(trade, write_db) for _, trade, write_db in entries])
+            
+            if any(item is _STOP_WRITER for item in batch):
+                db_trades.put(_STOP_WRITER)
+                if failed_rows:
+                    logger.error(
+                        "TradeLogger closed with %d trade(s) not written to %s",
+                        len(failed_rows), self.path
+                    )
+                return
+    
+    @staticmethod
+    def _db_loop(db_trades: "queue.SimpleQueue"):
+        """Persist appended trades to the DB, one call per consecutive run of the same logger."""
+        while True:
+            batch = db_trades.get()
+            if batch is _STOP_WRITER:
+                return
+            for write_db, group in itertools.groupby(batch, key=lambda entry: entry[1]):
+                # Also attempt to persist executed trades to Postgres if fields are available
+                try:
+                    write_db([trade for trade, _ in group])
+                except Exception:
+                    # DB persistence is best-effort; CSV remains source of truth if DB unavailable
+                    pass
+    
+    def append_rows(self, rows: List[Dict]):
+        """
+        Append rows to the CSV with a single write() per batch.
+        
+        The file is opened per batch (not per trade), so a burst of trades costs
+        one open/write/close, and a log that was rotated or removed since the
+        last batch is picked up by path. O_APPEND keeps appends at end-of-file
+        even after update_trade_exit rewrites the file. An empty file gets the
+        header row first.
+        """
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=TRADE_FIELDNAMES)
+        writer.writerows(rows)
+        payload = buffer.getvalue().encode('utf-8')
+
+        with self.file_lock:
+            flags = os.O_WRONLY | os.O_APPEND | os.O_CREAT | getattr(os, 'O_BINARY', 0)
+            fd = os.open(self.path, flags, 0o644)
+            try:
+                if os.fstat(fd).st_size == 0:
+                    header = io.StringIO()
+                    csv.writer(header).writerow(TRADE_FIELDNAMES)
+                    payload = header.getvalue().encode('utf-8') + payload
+                data = memoryview(payload)
+                while data:
+                    written = os.write(fd, data)
+                    data = data[written:]
+            finally:
+                os.close(fd)
+
+
 class TradeLogger:
     """
     Handles trade logging to CSV with comprehensive trade information.
     """
     
+    # Schema creation runs once per process, not on every DB write
+    _db_initialized = False
+    _db_init_lock = threading.Lock()
+    
     def __init__(self, trades_file: str = "logs/trades.csv"):
         """
         Initialize TradeLogger.
@@ -30,6 +233,9 @@ class TradeLogger:
         self.trades_file = trades_file
         self._ensure_directory_exists()
         self._ensure_header_exists()
+        # Trades are appended by a background writer shared with other loggers on this file
+        self._writer_lock = threading.Lock()
+        self._writer: Optional[_TradeWriter] = _TradeWriter.acquire(trades_file)
     
     def _ensure_directory_exists(self):
         """Ensure logs directory exists."""
@@ -40,19 +246,17 @@ class TradeLogger:
     def _ensure_header_exists(self):
         """Ensure CSV file has header row if it's new."""
         if not os.path.exists(self.trades_file):
-            header = [
-                'timestamp', 'symbol', 'strike', 'direction', 'order_id',
-                'entry', 'sl', 'tp', 'exit', 'pnl', 'status',
-                'pre_reason', 'post_outcome', 'quantity'
-            ]
             with open(self.trades_file, 'w', newline='') as f:
                 writer = csv.writer(f)
-                writer.writerow(header)
+                writer.writerow(TRADE_FIELDNAMES)
     
     def log_trade(self, trade: Dict):
         """
         Log a trade to CSV file.
         
+        The row is queued and written by a background thread; call flush() to
+        wait for pending writes.
+        
         Args:
             trade: Dictionary containing trade information with keys:
                    - symbol: Trading symbol
@@ -87,32 +291,58 @@ class TradeLogger:
             'quantity': trade.get('quantity', '')
         }
         
-        # Write to CSV
-        with open(self.trades_file, 'a', newline='') as f:
-            writer = csv.DictWriter(f, fieldnames=[
-                'timestamp', 'symbol', 'strike', 'direction', 'order_id',
-                'entry', 'sl', 'tp', 'exit', 'pnl', 'status',
-                'pre_reason', 'post_outcome', 'quantity'
-            ])
-            writer.writerow(row)
-
-        # Also attempt to persist executed trades to Postgres if fields are available
-        try:
-            self._maybe_write_trade_to_db(trade)
-        except Exception:
-            # DB persistence is best-effort; CSV remains source of truth if DB unavailable
-            pass
+        # Hand off to the background writer; CSV and DB writes happen off the caller's thread
+        self._get_writer().submit(row, trade, self._write_trades_to_db)
 
-    def _maybe_write_trade_to_db(self, trade: Dict):
+    def flush(self, timeout: Optional[float] = None):
         """
-        Best-effort write of executed trades into Postgres with idempotency.
+        Block until all trades queued so far have been appended to the CSV.
+        
+        Covers trades queued by every TradeLogger on this file. Does not wait for
+        the best-effort DB write, which runs on a separate thread.
+        
+        Args:
+            timeout: Maximum seconds to wait (None waits indefinitely)
+        """
+        writer = self._writer
+        if writer is not None:
+            writer.flush(timeout)
+
+    def close(self, timeout: Optional[float] = EXIT_FLUSH_TIMEOUT):
+        """
+        Detach from the shared writer; the last logger on the file writes queued
+        trades and stops the background threads.
+        
+        A later log_trade attaches again.
+        
+        Args:
+            timeout: Maximum seconds to wait for the writer to finish (None waits indefinitely)
+        """
+        with self._writer_lock:
+            writer, self._writer = self._writer, None
+        if writer is not None:
+            writer.release(timeout)
+
+    def _get_writer(self) -> _TradeWriter:
+        """Shared writer for this file, re-attaching after close()."""
+        writer = self._writer
+        if writer is None:
+            with self._writer_lock:
+                if self._writer is None:
+                    self._writer = _TradeWriter.acquire(self.trades_file)
+                writer = self._writer
+        return writer
+
+    def _trade_to_db_row(self, trade: Dict) -> Optional[Dict]:
+        """
+        Map a logged trade to a `trades` table row.
         Requires minimal fields: org_id, user_id, symbol, side(BUY/SELL), quantity, price, traded_at.
-        If not present, this is a no-op.
+        Returns None if they are not present or cannot be converted.
         """
         org_id = trade.get('org_id')
         user_id = trade.get('user_id')
         if not org_id or not user_id:
-            return
+            return None
 
         symbol = trade.get('symbol')
         side = trade.get('side') or trade.get('buy_sell')
@@ -124,12 +354,14 @@ class TradeLogger:
         quantity = trade.get('quantity')
         price = trade.get('entry') or trade.get('price')
         if price is None or quantity in (None, '') or not symbol or not side:
-            return
+            return None
 
         try:
             price_num = Decimal(str(price))
-        except (InvalidOperation, TypeError):
-            return
+            fees_num = Decimal(str(trade.get('fees', '0')) or '0')
+            quantity_num = int(quantity)
+        except (InvalidOperation, TypeError, ValueError):
+            return None
 
         order_id = trade.get('order_id') or None
         strategy_id = trade.get('strategy_id') or None
@@ -145,54 +377,94 @@ class TradeLogger:
         else:
             traded_at = datetime.utcnow()
 
+        return {
+            'org_id': str(org_id),
+            'user_id': str(user_id),
+            'strategy_id': str(strategy_id) if strategy_id else None,
+            'symbol': str(symbol),
+            'side': str(side).upper(),
+            'quantity': quantity_num,
+            'price': price_num,
+            'fees': fees_num,
+            'order_id': str(order_id) if order_id else None,
+            'broker': str(broker) if broker else None,
+            'traded_at': traded_at,
+        }
+
+    @classmethod
+    def _ensure_db_initialized(cls):
+        """Create tables on first use; retried on later writes if it fails."""
+        if cls._db_initialized:
+            return
+        with cls._db_init_lock:
+            if cls._db_initialized:
+                return
+            try:
+                init_database(create_all=True)
+                cls._db_initialized = True
+            except Exception:
+                pass
+
+    def _write_trades_to_db(self, trades: List[Dict]):
+        """
+        Best-effort write of executed trades into Postgres with idempotency.
+
+        Trades without the required fields are skipped. On Postgres/SQLite all rows go
+        out as one INSERT ... ON CONFLICT DO NOTHING against the uq_trade_idem key, so
+        duplicates are dropped by the database instead of raising IntegrityError.
+        """
+        rows = [row for row in (self._trade_to_db_row(t) for t in trades) if row is not None]
+        if not rows:
+            return
+
         # Ensure tables exist in dev environments
-        try:
-            init_database(create_all=True)
-        except Exception:
-            pass
+        self._ensure_db_initialized()
 
-        sess_gen = get_session()
-        db = next(sess_gen)
+        db = ScopedSession()
         try:
-            row = Trade(
-                org_id=str(org_id),
-                user_id=str(user_id),
-                strategy_id=str(strategy_id) if strategy_id else None,
-                symbol=str(symbol),
-                side=str(side).upper(),
-                quantity=int(quantity),
-                price=price_num,
-                fees=Decimal(str(trade.get('fees', '0')) or '0'),
-                order_id=str(order_id) if order_id else None,
-                broker=str(broker) if broker else None,
-                traded_at=traded_at,
-            )
-            db.add(row)
-            db.commit()
-        except IntegrityError:
-            db.rollback()
-            # Idempotent duplicate; ignore
+            dialect = db.get_bind().dialect.name
+            if dialect in ('postgresql', 'sqlite'):
+                if dialect == 'postgresql':
+                    from sqlalchemy.dialects.postgresql import insert
+                else:
+                    from sqlalchemy.dialects.sqlite import insert
+                stmt = insert(Trade).on_conflict_do_nothing(
+                    index_elements=['org_id', 'user_id', 'order_id', 'symbol', 'traded_at']
+                )
+                db.execute(stmt, rows)
+                db.commit()
+            else:
+                # No portable upsert; fall back to per-row inserts and treat duplicates as no-ops
+                for row in rows:
+                    db.add(Trade(**row))
+                    try:
+                        db.commit()
+                    except IntegrityError:
+                        db.rollback()
         except Exception:
             db.rollback()
             raise
         finally:
-            try:
-                next(sess_gen)
-            except StopIteration:
-                pass
+            ScopedSession.remove()
     
     def get_all_trades(self) -> pd.DataFrame:
         """
         Read all trades from CSV file.
         
         Returns:
-            DataFrame with all trade records
+            DataFrame with all trade records (status and direction as categoricals)
         """
+        self.flush()
+        # Low-cardinality labels as categoricals: 1-byte codes and integer comparisons
+        return self._read_trades(dtype={'status': 'category', 'direction': 'category'})
+
+    def _read_trades(self, dtype: Optional[Dict] = None) -> pd.DataFrame:
+        """Read the CSV as-is, without waiting for queued writes."""
         if not os.path.exists(self.trades_file):
             return pd.DataFrame()
         
         try:
-            df = pd.read_csv(self.trades_file)
+            df = pd.read_csv(self.trades_file, dtype=dtype)
             return df
         except Exception as e:
             print(f"Error reading trades: {e}")
@@ -205,12 +477,26 @@ class TradeLogger:
         Returns:
             DataFrame with open trades
         """
-        df = self.get_all_trades()
-        if df.empty:
-            return df
+        self.flush()
+        if not os.path.exists(self.trades_file):
+            return pd.DataFrame()
         
-        open_statuses = ['open', 'pending']
-        return df[df['status'].isin(open_statuses)]
+        # Filter chunk by chunk so closed trades are dropped before the frames are concatenated
+        open_statuses = ('open', 'pending')
+        try:
+            chunks = [
+                chunk[chunk['status'].isin(open_statuses)]
+                for chunk in pd.read_csv(
+                    self.trades_file, chunksize=65536, dtype={'status': 'category'}
+                )
+            ]
+        except Exception as e:
+            print(f"Error reading trades: {e}")
+            return pd.DataFrame()
+        
+        if not chunks:
+            return pd.DataFrame()
+        return pd.concat(chunks, ignore_index=True)
     
     def get_trade_stats(self) -> Dict:
         """
@@ -232,7 +518,7 @@ class TradeLogger:
                 'avg_loss': 0.0
             }
         
-        closed_trades = df[df['status'] == 'closed'].copy()
+        closed_trades = df[df['status'] == 'closed']
         
         if closed_trades.empty:
             return {
@@ -245,22 +531,28 @@ class TradeLogger:
                 'avg_loss': 0.0
             }
         
-        # Convert PnL to numeric
-        closed_trades['pnl'] = pd.to_numeric(closed_trades['pnl'], errors='coerce')
+        # Convert PnL to numeric and reduce on the raw float array
+        pnl = pd.to_numeric(closed_trades['pnl'], errors='coerce').to_numpy(dtype=np.float64)
+        n_closed = len(pnl)
         
-        winning_trades = closed_trades[closed_trades['pnl'] > 0]
-        losing_trades = closed_trades[closed_trades['pnl'] < 0]
+        win_mask = pnl > 0
+        loss_mask = pnl < 0
+        n_win = int(np.count_nonzero(win_mask))
+        n_loss = int(np.count_nonzero(loss_mask))
+        sum_win = float(pnl.sum(where=win_mask))
+        sum_loss = float(pnl.sum(where=loss_mask))
         
-        total_pnl = closed_trades['pnl'].sum()
-        win_rate = (len(winning_trades) / len(closed_trades) * 100) if len(closed_trades) > 0 else 0
+        # NaN (unparseable) PnL is neither a win nor a loss, so the total is the two sums
+        total_pnl = sum_win + sum_loss
+        win_rate = (n_win / n_closed * 100) if n_closed > 0 else 0
         
-        avg_win = winning_trades['pnl'].mean() if len(winning_trades) > 0 else 0.0
-        avg_loss = losing_trades['pnl'].mean() if len(losing_trades) > 0 else 0.0
+        avg_win = sum_win / n_win if n_win > 0 else 0.0
+        avg_loss = sum_loss / n_loss if n_loss > 0 else 0.0
         
         return {
-            'total_trades': len(closed_trades),
-            'winning_trades': len(winning_trades),
-            'losing_trades': len(losing_trades),
+            'total_trades': n_closed,
+            'winning_trades': n_win,
+            'losing_trades': n_loss,
             'total_pnl': float(total_pnl),
             'win_rate': float(win_rate),
             'avg_win': float(avg_win),
@@ -277,25 +569,37 @@ class TradeLogger:
             pnl: Profit/Loss
             outcome: Exit reason/outcome
         """
-        # Read all trades
-        df = self.get_all_trades()
-        
-        if df.empty:
-            return
-        
-        # Find trade by order_id
-        mask = df['order_id'] == order_id
-        if not mask.any():
-            return
-        
-        # Update values
-        df.loc[mask, 'exit'] = exit_price
-        df.loc[mask, 'pnl'] = pnl
-        df.loc[mask, 'status'] = 'closed'
-        df.loc[mask, 'post_outcome'] = outcome
-        
-        # Write back to CSV
-        df.to_csv(self.trades_file, index=False)
+        # Let queued appends land, then hold the file while rewriting it
+        writer = self._get_writer()
+        writer.flush()
+        with writer.file_lock:
+            # Read the updated columns as object so scalar writes never need a dtype upcast
+            df = self._read_trades(dtype={
+                'order_id': str, 'exit': object, 'pnl': object,
+                'status': object, 'post_outcome': object
+            })
+            
+            if df.empty:
+                return
+            
+            # Find trade by order_id
+            rows = np.flatnonzero((df['order_id'] == str(order_id)).to_numpy())
+            if rows.size == 0:
+                return
+            
+            # Update values in place by position (no per-column boolean alignment)
+            exit_col = df.columns.get_loc('exit')
+            pnl_col = df.columns.get_loc('pnl')
+            status_col = df.columns.get_loc('status')
+            outcome_col = df.columns.get_loc('post_outcome')
+            for i in rows:
+                df.iat[i, exit_col] = exit_price
+                df.iat[i, pnl_col] = pnl
+                df.iat[i, status_col] = 'closed'
+                df.iat[i, outcome_col] = outcome
+            
+            # Write back to CSV
+            df.to_csv(self.trades_file, index=False)
 
     def import_trades_from_csv(self, file_like) -> Dict:
         """
@@ -328,7 +632,7 @@ class TradeLogger:
         incoming = incoming.rename(columns={k: v for k, v in rename_map.items() if k in incoming.columns})
 
         # Ensure all expected columns exist
-        expected_cols = ['timestamp','symbol','strike','direction','order_id','entry','sl','tp','exit','pnl','status','pre_reason','post_outcome','quantity']
+        expected_cols = list(TRADE_FIELDNAMES)
         for col in expected_cols:
             if col not in incoming.columns:
                 incoming[col] = ''
@@ -339,30 +643,42 @@ class TradeLogger:
         except Exception:
             incoming['timestamp'] = incoming['timestamp'].astype(str)
 
-        # Read existing
-        existing = self.get_all_trades()
-        if existing.empty:
-            merged = incoming[expected_cols].copy()
-        else:
-            merged = pd.concat([existing, incoming[expected_cols]], ignore_index=True)
+        # Read existing (after queued appends land) and rewrite while holding the file
+        writer = self._get_writer()
+        writer.flush()
+        with writer.file_lock:
+            existing = self._read_trades()
+            if existing.empty:
+                merged = incoming[expected_cols].copy()
+            else:
+                merged = pd.concat([existing, incoming[expected_cols]], ignore_index=True)
 
-        before = len(merged)
-        merged = merged.drop_duplicates(subset=['timestamp','symbol','strike','direction','quantity'], keep='first')
-        after = len(merged)
+            before = len(merged)
+            merged = merged.drop_duplicates(subset=['timestamp','symbol','strike','direction','quantity'], keep='first')
+            after = len(merged)
 
-        # Write back
-        merged.to_csv(self.trades_file, index=False)
+            # Write back
+            merged.to_csv(self.trades_file, index=False)
 
         return {"imported": len(incoming), "skipped": before + 0 - after, "total": after}
 
 
+_default_logger: Optional[TradeLogger] = None
+_default_logger_lock = threading.Lock()
+
+
 def log_trade(trade: Dict):
     """
     Convenience function for logging a trade.
     
+    Uses a shared default TradeLogger so repeated calls reuse one writer thread.
+    
     Args:
         trade: Trade dictionary (see TradeLogger.log_trade for format)
     """
-    logger = TradeLogger()
-    logger.log_trade(trade)
-
+    global _default_logger
+    if _default_logger is None:
+        with _default_logger_lock:
+            if _default_logger is None:
+                _default_logger = TradeLogger()
+    _default_logger.log_trade(trade)
@@ -3,15 +3,106 @@ Trade Management Functions for NIFTY Options Trading
 Modular functions for signal detection, trade eligibility, position management, and exits
 """
 
+import functools
+import logging
+import re
+
 import pandas as pd
 import numpy as np
-from dataclasses import dataclass
-from typing import Optional, Dict, Tuple, Any
-from datetime import datetime, timedelta
+from dataclasses import dataclass, field
+from collections import deque
+from typing import TYPE_CHECKING, Final, NamedTuple, Optional, Dict, List, Tuple, Any, Deque, Iterable, Iterator, Sequence, Union
+from datetime import date, datetime, timedelta
 from logzero import logger
 
+try:
+    from numba import njit, prange
+except ImportError:
+    # Optional: speeds up inside-bar scans and book-level (batch) position checks
+    njit = prange = None
+
+if TYPE_CHECKING:
+    # Only for annotations: detect_signal_candle_arrow works on the table's own methods
+    import pyarrow as pa
+
+
+# Default lot size for NIFTY options
+DEFAULT_LOT_SIZE: Final[int] = 75
+# NIFTY strike ladder spacing
+STRIKE_STEP: Final[int] = 50
+# Initial stop loss as a fraction of entry premium (see initial_sl)
+INITIAL_SL_RATIO: Final[float] = 0.65
+
+# Candles checked from the end before falling back to a vectorized scan of the rest
+TAIL_SCAN_BARS = 32
+# Per-instrument tick snapshot row for book-level processing (see manage_ticks_batch).
+# Keep one np.zeros(n_instruments, dtype=SNAPSHOT_DTYPE) buffer and overwrite rows in place.
+SNAPSHOT_DTYPE = np.dtype([
+    ('ts_ns', 'i8'),      # Tick time, ns since epoch
+    ('premium', 'f8'),    # Current option premium
+    ('atr', 'f8'),
+    ('iv', 'f8'),
+    ('spot', 'f8'),
+])
 
-@dataclass
+# Default premium advance (in ATRs) required before recomputing the trail after an update
+TRAIL_MIN_MOVE_ATR = 0.25
+# Swing low passed to _trailing_stop when there are no swings
+_NO_SWING = float('nan')
+
+
+def _last_inside_bar(highs: Sequence[float], lows: Sequence[float]) -> int:
+    """
+    Index of the most recent inside bar (scanning back from the end), or -1 if none.
+    
+    Written as a plain loop so numba can compile it; see _last_inside_bar_jit.
+    """
+    for i in range(len(highs) - 1, 0, -1):
+        if highs[i] < highs[i - 1] and lows[i] > lows[i - 1]:
+            return i
+    return -1
+
+
+_last_inside_bar_jit = njit(cache=True, boundscheck=False)(_last_inside_bar) if njit is not None else None
+
+
+def _find_latest_inside_bar(highs: np.ndarray, lows: np.ndarray) -> int:
+    """
+    Index of the most recent inside bar, or -1 if none.
+    
+    Only the latest hit matters, so the scan starts from the end and stops at the
+    first match. With numba installed the whole scan runs in the compiled kernel,
+    which beats the fallbacks at every history length once warm. Otherwise the
+    last TAIL_SCAN_BARS candles are checked with a plain loop (the usual case
+    stops there), and only if none match is the rest of the history scanned with
+    one vectorized mask.
+    """
+    if _last_inside_bar_jit is not None and highs.dtype.kind in 'fi' and lows.dtype.kind in 'fi':
+        return int(_last_inside_bar_jit(highs, lows))
+    
+    n = len(highs)
+    
+    tail_start = max(0, n - TAIL_SCAN_BARS)
+    idx = _last_inside_bar(highs[tail_start:].tolist(), lows[tail_start:].tolist())
+    if idx >= 0:
+        return tail_start + idx
+    if tail_start == 0:
+        return -1
+    
+    # Candles 1..tail_start (the tail scan covered every later candle)
+    head_highs = highs[:tail_start + 1]
+    head_lows = lows[:tail_start + 1]
+    inside_bars = np.flatnonzero((head_highs[1:] < head_highs[:-1]) & (head_lows[1:] > head_lows[:-1]))
+    # Mask index i refers to candle i + 1
+    return int(inside_bars[-1]) + 1 if inside_bars.size else -1
+
+
+# Config times such as expiry_exit_time: "HH:MM" or "HHMM", optionally with AM/PM
+# ("3:00 PM", "0915"); whitespace allowed around the time and the colon ("15: 30")
+_HHMM_RE = re.compile(r"\s*(\d{1,2})(?:\s*:\s*(\d{1,2})|(\d{2}))\s*([AaPp][Mm])?\s*")
+
+
+@dataclass(slots=True, frozen=True)
 class Signal:
     """Signal candle with breakout range"""
     range_high: float
@@ -19,16 +110,24 @@ class Signal:
     ts: datetime
 
 
-@dataclass
+class RangeView(NamedTuple):
+    """Breakout range of the latest inside bar without the Signal's timestamp (see detect_signal_range)"""
+    high: float
+    low: float
+    inside_idx: int  # Position of the inside bar in the frame
+    parent_idx: int  # Position of the parent (reference) candle
+
+
+@dataclass(slots=True, frozen=True)
 class Option:
     """Option contract details"""
     symbol: str
     strike: int
     expiry: str
-    lot: int = 75
+    lot: int = DEFAULT_LOT_SIZE
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Exit:
     """Exit signal for position"""
     reason: str
@@ -37,7 +136,99 @@ class Exit:
     timestamp: datetime
 
 
-@dataclass
+class SwingWindow:
+    """
+    Last 3 swing highs/lows with their minimum maintained on append.
+    
+    Use in place of a plain list for TradingContext.swings when swings arrive
+    incrementally, so update_trailing reads `low` instead of slicing every tick.
+    """
+    __slots__ = ('_swings', 'low')
+    
+    def __init__(self, swings: Iterable[float] = ()):
+        self._swings: Deque[float] = deque(maxlen=3)
+        self.low: Optional[float] = None
+        for swing in swings:
+            self.append(swing)
+    
+    def append(self, swing: float):
+        """Add a new swing and refresh the cached minimum."""
+        self._swings.append(swing)
+        self.low = min(self._swings)
+    
+    def __len__(self) -> int:
+        return len(self._swings)
+    
+    def __iter__(self) -> Iterator[float]:
+        return iter(self._swings)
+
+
+class SwingBook:
+    """
+    Last 3 swings for every position in a book, stored as one float64 ring buffer.
+    
+    Row i holds position i's swings (NaN for empty slots), so the per-position
+    swing lows for update_trailing_vec come from a single reduction instead of
+    one SwingWindow per position.
+    """
+    __slots__ = ('_swings', '_next')
+    
+    def __init__(self, n_positions: int):
+        self._swings = np.full((n_positions, 3), np.nan)
+        self._next = np.zeros(n_positions, dtype=np.intp)  # Slot the next swing overwrites
+    
+    def push(self, rows: Union[int, np.ndarray], swings: Union[float, np.ndarray]):
+        """
+        Record new swings, dropping each row's oldest once it holds 3.
+        
+        Args:
+            rows: Position index, or array of distinct position indices
+            swings: Swing value(s) for those rows
+        """
+        slots = self._next[rows]
+        self._swings[rows, slots] = swings
+        self._next[rows] = (slots + 1) % 3
+    
+    def reset(self, rows: Union[int, np.ndarray]):
+        """Clear the swings of closed positions so their rows can be reused."""
+        self._swings[rows] = np.nan
+        self._next[rows] = 0
+    
+    def lows(self) -> np.ndarray:
+        """Min of each position's last 3 swings, NaN for positions without swings (swing_min3)."""
+        return np.fmin.reduce(self._swings, axis=1)
+    
+    def __len__(self) -> int:
+        return self._swings.shape[0]
+
+
+@dataclass(slots=True)
+class Position:
+    """Open option position tracked tick by tick (mutable: SL bookkeeping is updated in place)"""
+    entry_premium: float
+    quantity: int
+    config: Dict[str, Any] = field(default_factory=dict)
+    initial_sl: Optional[float] = None  # entry_premium * INITIAL_SL_RATIO, set on open or first tick
+    last_trail_premium: Optional[float] = None  # Premium at the last trailing SL update
+    rules: Optional["TickRules"] = None  # Exit rules resolved from config, set on open or first tick
+    
+    @classmethod
+    def from_dict(cls, position: Dict[str, Any]) -> "Position":
+        """Build a Position from the legacy position dictionary."""
+        entry_premium = position.get('entry_premium', 0)
+        initial_sl_price = position.get('initial_sl')
+        if initial_sl_price is None:
+            initial_sl_price = entry_premium * INITIAL_SL_RATIO
+        return cls(
+            entry_premium=entry_premium,
+            quantity=position.get('quantity', 0),
+            config=position.get('config', {}),
+            initial_sl=initial_sl_price,
+            last_trail_premium=position.get('_last_trail_premium'),
+        )
+
+
+@dataclass(slots=True, frozen=True)
 class TradingContext:
     """Context for trading decisions"""
     spot: float
@@ -45,18 +236,134 @@ class TradingContext:
     atr: float  # Average True Range
     spread: float  # Bid-Ask spread
     gap_pct: float  # Gap percentage from previous close
-    swings: list  # Recent swing highs/lows
+    swings: Union[list, SwingWindow]  # Recent swing highs/lows
     is_expiry_day: bool
     account_risk: float  # Risk amount in rupees
     config: Dict[str, Any]
 
 
+@dataclass(slots=True, frozen=True)
+class FilterThresholds:
+    """Eligibility filter thresholds (config['filters']) resolved once per session"""
+    max_gap_pct: float = 2.0
+    min_iv: float = 10.0
+    max_iv: float = 50.0
+    max_spread_pct: float = 0.5
+    min_atr_pct: float = 0.5
+    max_atr_pct: float = 3.0
+    
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "FilterThresholds":
+        """Build thresholds from a strategy config, using defaults for missing keys."""
+        filters = config.get('filters', {})
+        return cls(
+            max_gap_pct=filters.get('max_gap_pct', 2.0),
+            min_iv=filters.get('min_iv', 10.0),
+            max_iv=filters.get('max_iv', 50.0),
+            max_spread_pct=filters.get('max_spread_pct', 0.5),
+            min_atr_pct=filters.get('min_atr_pct', 0.5),
+            max_atr_pct=filters.get('max_atr_pct', 3.0),
+        )
+
+
+@dataclass(slots=True, frozen=True)
+class TrailingConfig:
+    """Trailing stop settings (config['trailing']) resolved once per session"""
+    enabled: bool = False  # Whether config has a 'trailing' section at all
+    atr_multiplier: float = 1.5
+    iv_adjustment: float = 0.1
+    min_move_atr: float = TRAIL_MIN_MOVE_ATR
+    
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "TrailingConfig":
+        """Build trailing settings from a strategy config, using defaults for missing keys."""
+        trailing = config.get('trailing')
+        if trailing is None:
+            return cls()
+        return cls(
+            enabled=True,
+            atr_multiplier=trailing.get('atr_multiplier', 1.5),
+            iv_adjustment=trailing.get('iv_adjustment', 0.1),
+            min_move_atr=trailing.get('min_move_atr', TRAIL_MIN_MOVE_ATR),
+        )
+
+
+@dataclass(slots=True, frozen=True)
+class TickRules:
+    """
+    Exit rules manage_trade_tick applies to a position, resolved once from config.
+    
+    One instance can be shared by every position opened under the same config.
+    """
+    take_profit_points: Optional[float] = None  # None when take profit is not configured
+    trailing: TrailingConfig = TrailingConfig()
+    expiry_exit_hhmm: int = 1500  # Expiry-day exit cutoff as HHMM
+    
+    @classmethod
+    def from_config(
+        cls,
+        config: Dict[str, Any],
+        position_config: Optional[Dict[str, Any]] = None
+    ) -> "TickRules":
+        """
+        Build rules from the strategy config and the position's own config.
+        
+        Args:
+            config: Strategy config (take_profit, trailing)
+            position_config: Position config (expiry_exit_time)
+        """
+        tp_config = config.get('take_profit', {})
+        return cls(
+            take_profit_points=tp_config.get('points', 54) if tp_config else None,  # Default from config
+            trailing=TrailingConfig.from_config(config),
+            expiry_exit_hhmm=_expiry_exit_hhmm(position_config or {}),
+        )
+
+
+def _float_column(h1: pd.DataFrame, name: str) -> np.ndarray:
+    """
+    Column as a float64 ndarray (no copy for float64 columns).
+    
+    Goes through Series.values rather than Series.to_numpy, whose per-call
+    overhead is several times the cost of the tail scan that follows.
+    Arrow-backed columns (pd.ArrowDtype) are read from their Arrow data.
+    """
+    column = h1[name]
+    if isinstance(column.dtype, pd.ArrowDtype):
+        return _arrow_floats(column.array.__arrow_array__())
+    return np.asarray(column.values, dtype=np.float64)
+
+
+def _arrow_floats(column: Any) -> np.ndarray:
+    """
+    Arrow ChunkedArray as a float64 ndarray, nulls as NaN.
+    
+    Zero-copy for a single-chunk float64 column without nulls. Called without
+    arguments: older pyarrow releases' ChunkedArray.to_numpy takes none.
+    """
+    return np.asarray(column.to_numpy(), dtype=np.float64)
+
+
+def _datetime_values(dates: Union[pd.Series, pd.Index]) -> Sequence[Any]:
+    """
+    Candle times indexable by position with cheap scalar access.
+    
+    tz-naive datetime64 data comes back as the raw ndarray (np.datetime64 scalars,
+    no Timestamp boxing per lookup); tz-aware and other dtypes keep their pandas
+    array so no timezone information is lost.
+    """
+    if isinstance(dates.dtype, np.dtype):
+        return dates.values
+    return dates.array
+
+
 def detect_signal_candle(h1: pd.DataFrame) -> Optional[Signal]:
     """
     Detect Inside Bar pattern in 1-hour timeframe and return signal with breakout range.
     
     Args:
-        h1: DataFrame with 1-hour OHLC data (columns: Date, Open, High, Low, Close, Volume)
+        h1: DataFrame with 1-hour OHLC data (columns: Date, Open, High, Low, Close, Volume).
+            Without a Date column, a DatetimeIndex supplies the candle times.
     
     Returns:
         Signal object with range_high, range_low, and timestamp, or None if no pattern
@@ -65,33 +372,71 @@ def detect_signal_candle(h1: pd.DataFrame) -> Optional[Signal]:
         logger.debug("Insufficient data for signal detection (need at least 2 candles)")
         return None
     
-    # Detect Inside Bar patterns
-    inside_bars = []
-    for i in range(1, len(h1)):
-        current_high = h1['High'].iloc[i]
-        current_low = h1['Low'].iloc[i]
-        prev_high = h1['High'].iloc[i-1]
-        prev_low = h1['Low'].iloc[i-1]
-        
-        # Inside bar condition: current candle completely inside previous candle
-        if current_high < prev_high and current_low > prev_low:
-            inside_bars.append(i)
+    # Extract columns once; nothing below goes back to the DataFrame
+    highs = _float_column(h1, 'High')
+    lows = _float_column(h1, 'Low')
+    # Candle times by position: the Date column, else a DatetimeIndex
+    try:
+        dates = _datetime_values(h1['Date'])
+    except KeyError:
+        dates = _datetime_values(h1.index) if isinstance(h1.index, pd.DatetimeIndex) else None
+    
+    return _detect_signal_candle(highs, lows, dates)
+
+
+def detect_signal_candle_arrow(table: "pa.Table") -> Optional[Signal]:
+    """
+    detect_signal_candle for a pyarrow.Table (e.g. candles read from Parquet).
+    
+    High/Low come straight from the Arrow columns, without building a DataFrame;
+    the Date column, if present, supplies the candle times. pyarrow is needed
+    only by the caller that builds the table; this module does not import it.
+    
+    Args:
+        table: Table with 1-hour OHLC columns (High, Low, optionally Date)
+    
+    Returns:
+        Signal object, or None if no pattern
+    """
+    if table.num_rows < 2:
+        logger.debug("Insufficient data for signal detection (need at least 2 candles)")
+        return None
+    
+    highs = _arrow_floats(table.column('High'))
+    lows = _arrow_floats(table.column('Low'))
+    if 'Date' in table.column_names:
+        dates = _datetime_values(table.column('Date').to_pandas())
+    else:
+        dates = None
     
-    if not inside_bars:
+    return _detect_signal_candle(highs, lows, dates)
+
+
+def _detect_signal_candle(
+    highs: np.ndarray,
+    lows: np.ndarray,
+    dates: Optional[Sequence[Any]]
+) -> Optional[Signal]:
+    """Body of detect_signal_candle, on columns already extracted from the frame."""
+    # Detect Inside Bar patterns: current candle completely inside previous candle
+    latest_idx = _find_latest_inside_bar(highs, lows)
+    
+    if latest_idx < 0:
         logger.debug("No Inside Bar pattern detected")
         return None
     
     # Use the most recent Inside Bar
-    latest_idx = inside_bars[-1]
     reference_idx = latest_idx - 1
     
     # Range comes from the reference candle (parent candle)
-    range_high = h1['High'].iloc[reference_idx]
-    range_low = h1['Low'].iloc[reference_idx]
+    range_high = float(highs[reference_idx])
+    range_low = float(lows[reference_idx])
     
-    # Get timestamp from the inside bar candle
-    if 'Date' in h1.columns:
-        ts = h1['Date'].iloc[latest_idx]
+    # Get timestamp from the inside bar candle (converted only for the one candle used)
+    if dates is not None:
+        ts = dates[latest_idx]
+        if isinstance(ts, np.datetime64):
+            ts = pd.Timestamp(ts)
         if isinstance(ts, pd.Timestamp):
             ts = ts.to_pydatetime()
     else:
@@ -105,6 +450,77 @@ def detect_signal_candle(h1: pd.DataFrame) -> Optional[Signal]:
     return Signal(range_high=range_high, range_low=range_low, ts=ts)
 
 
+def detect_signal_range(h1: pd.DataFrame) -> Optional[RangeView]:
+    """
+    Breakout range of the latest Inside Bar, for callers that only need the prices.
+    
+    Same detection as detect_signal_candle, but skips the timestamp lookup, the
+    log line; pair it with breakout_side_range, e.g.
+    breakout_side_range(close, view.high, view.low).
+    
+    Args:
+        h1: DataFrame with 1-hour OHLC data (High and Low columns are used)
+    
+    Returns:
+        RangeView with the parent candle's high/low and both candle positions, or None
+    """
+    if len(h1) < 2:
+        return None
+    
+    highs = _float_column(h1, 'High')
+    lows = _float_column(h1, 'Low')
+    latest_idx = _find_latest_inside_bar(highs, lows)
+    if latest_idx < 0:
+        return None
+    
+    parent_idx = latest_idx - 1
+    return RangeView(float(highs[parent_idx]), float(lows[parent_idx]), latest_idx, parent_idx)
+
+
+def detect_signal_candle_batch(h1: pd.DataFrame) -> List[Signal]:
+    """
+    Every Inside Bar signal in a 1-hour history, oldest first, for backtesting.
+    
+    Equivalent to calling detect_signal_candle on each prefix of h1 and keeping
+    each new signal, but done with one vectorized pass instead of a scan per bar.
+    
+    Args:
+        h1: DataFrame with 1-hour OHLC data (columns: Date, Open, High, Low, Close, Volume)
+    
+    Returns:
+        List of Signal objects (range from the parent candle, ts of the inside bar)
+    """
+    if len(h1) < 2:
+        return []
+    
+    highs = _float_column(h1, 'High')
+    lows = _float_column(h1, 'Low')
+    
+    # Mask index i refers to inside bar i + 1, whose parent candle is i
+    parents = np.flatnonzero((highs[1:] < highs[:-1]) & (lows[1:] > lows[:-1]))
+    if parents.size == 0:
+        return []
+    
+    if 'Date' in h1.columns:
+        dates = h1['Date'].iloc[parents + 1].tolist()
+    elif isinstance(h1.index, pd.DatetimeIndex):
+        dates = h1.index[parents + 1].tolist()
+    else:
+        dates = None
+    
+    if dates is not None:
+        timestamps = [ts.to_pydatetime() if isinstance(ts, pd.Timestamp) else ts for ts in dates]
+    else:
+        timestamps = [datetime.now()] * parents.size
+    
+    return [
+        Signal(range_high=range_high, range_low=range_low, ts=ts)
+        for range_high, range_low, ts in zip(
+            highs[parents].tolist(), lows[parents].tolist(), timestamps
+        )
+    ]
+
+
 def breakout_side(h1_close: float, signal: Signal) -> Optional[str]:
     """
     Determine breakout side based on close price relative to signal range.
@@ -120,21 +536,62 @@ def breakout_side(h1_close: float, signal: Signal) -> Optional[str]:
     """
     if signal is None:
         return None
+    return breakout_side_range(h1_close, signal.range_high, signal.range_low)
+
+
+def breakout_side_range(close: float, range_high: float, range_low: float) -> Optional[str]:
+    """
+    breakout_side on plain floats, for callers that already hold the range.
     
-    if h1_close > signal.range_high:
-        logger.debug(f"Bullish breakout: {h1_close:.2f} > {signal.range_high:.2f} (CE)")
-        return "CE"
-    elif h1_close < signal.range_low:
-        logger.debug(f"Bearish breakout: {h1_close:.2f} < {signal.range_low:.2f} (PE)")
-        return "PE"
-    else:
-        logger.debug(
-            f"No breakout: {signal.range_low:.2f} <= {h1_close:.2f} <= {signal.range_high:.2f}"
-        )
-        return None
+    Returns:
+        "CE" above range_high, "PE" below range_low, None inside the range
+    """
+    side = "CE" if close > range_high else ("PE" if close < range_low else None)
+    
+    if logger.isEnabledFor(logging.DEBUG):
+        if side == "CE":
+            logger.debug("Bullish breakout: %.2f > %.2f (CE)", close, range_high)
+        elif side == "PE":
+            logger.debug("Bearish breakout: %.2f < %.2f (PE)", close, range_low)
+        else:
+            logger.debug("No breakout: %.2f <= %.2f <= %.2f", range_low, close, range_high)
+    
+    return side
 
 
-def eligible_to_trade(context: TradingContext) -> bool:
+def breakout_side_batch(
+    closes: np.ndarray,
+    range_highs: np.ndarray,
+    range_lows: np.ndarray
+) -> np.ndarray:
+    """
+    Vectorized breakout_side for scanning many symbols at once.
+    
+    Prefer this over calling breakout_side in a loop when scanning more than
+    a handful of symbols per tick.
+    
+    Args:
+        closes: Current 1-hour close per symbol
+        range_highs: Signal range_high per symbol
+        range_lows: Signal range_low per symbol
+    
+    Returns:
+        Object array with "CE", "PE" or None per symbol (same rules as breakout_side)
+    """
+    closes = np.asarray(closes, dtype=np.float64)
+    range_highs = np.asarray(range_highs, dtype=np.float64)
+    range_lows = np.asarray(range_lows, dtype=np.float64)
+    
+    sides = np.full(closes.shape, None, dtype=object)
+    sides[closes < range_lows] = "PE"
+    sides[closes > range_highs] = "CE"
+    return sides
+
+
+def eligible_to_trade(
+    context: TradingContext,
+    thresholds: Optional[FilterThresholds] = None
+) -> bool:
     """
     Check if conditions are eligible for trading based on filters.
     
@@ -146,6 +603,8 @@ def eligible_to_trade(context: TradingContext) -> bool:
     
     Args:
         context: TradingContext with market conditions
+        thresholds: Pre-resolved filter thresholds (see FilterThresholds.from_config).
+                    Pass these when checking every tick; resolved from context.config if omitted.
     
     Returns:
         True if eligible to trade, False otherwise
@@ -153,41 +612,65 @@ def eligible_to_trade(context: TradingContext) -> bool:
     if context is None:
         return False
     
-    config = context.config.get('filters', {})
+    ft = thresholds if thresholds is not None else FilterThresholds.from_config(context.config)
     
     # Gap filter: Avoid trading on large gaps (>2%)
-    max_gap_pct = config.get('max_gap_pct', 2.0)
-    if abs(context.gap_pct) > max_gap_pct:
-        logger.debug(f"Gap filter: gap {context.gap_pct:.2f}% exceeds {max_gap_pct}%")
+    if abs(context.gap_pct) > ft.max_gap_pct:
+        logger.debug("Gap filter: gap %.2f%% exceeds %s%%", context.gap_pct, ft.max_gap_pct)
         return False
     
     # IV filter: Check if IV is within acceptable range
-    min_iv = config.get('min_iv', 10.0)
-    max_iv = config.get('max_iv', 50.0)
-    if context.iv < min_iv or context.iv > max_iv:
-        logger.debug(f"IV filter: IV {context.iv:.2f} outside range [{min_iv}, {max_iv}]")
+    if context.iv < ft.min_iv or context.iv > ft.max_iv:
+        logger.debug("IV filter: IV %.2f outside range [%s, %s]", context.iv, ft.min_iv, ft.max_iv)
         return False
     
+    # Spread and ATR are both expressed as a percentage of spot; compare
+    # 100 * value against threshold * spot instead of dividing by spot
+    spot = context.spot
+    if spot > 0:
+        spread_x100 = 100.0 * context.spread
+        atr_x100 = 100.0 * context.atr
+    else:
+        # No spot: both count as 0% of spot
+        spot, spread_x100, atr_x100 = 1.0, 0.0, 0.0
+    
     # Spread filter: Check bid-ask spread (as percentage of spot)
-    max_spread_pct = config.get('max_spread_pct', 0.5)
-    spread_pct = (context.spread / context.spot) * 100 if context.spot > 0 else 0
-    if spread_pct > max_spread_pct:
-        logger.debug(f"Spread filter: spread {spread_pct:.2f}% exceeds {max_spread_pct}%")
+    if spread_x100 > ft.max_spread_pct * spot:
+        logger.debug("Spread filter: spread %.2f%% exceeds %s%%", spread_x100 / spot, ft.max_spread_pct)
         return False
     
     # ATR filter: Check if ATR indicates acceptable volatility
-    min_atr_pct = config.get('min_atr_pct', 0.5)
-    max_atr_pct = config.get('max_atr_pct', 3.0)
-    atr_pct = (context.atr / context.spot) * 100 if context.spot > 0 else 0
-    if atr_pct < min_atr_pct or atr_pct > max_atr_pct:
-        logger.debug(f"ATR filter: ATR {atr_pct:.2f}% outside range [{min_atr_pct}, {max_atr_pct}]")
+    if atr_x100 < ft.min_atr_pct * spot or atr_x100 > ft.max_atr_pct * spot:
+        logger.debug(
+            "ATR filter: ATR %.2f%% outside range [%s, %s]", atr_x100 / spot, ft.min_atr_pct, ft.max_atr_pct
+        )
         return False
     
     logger.debug("All filters passed - eligible to trade")
     return True
 
 
-def pick_option(symbol: str, spot: float, side: str) -> Option:
+@functools.lru_cache(maxsize=8)
+def _weekly_expiry(today: date, after_close: bool) -> str:
+    """
+    Nearest Thursday weekly expiry as "YYYY-MM-DD", computed once per trading day.
+    
+    Args:
+        today: Current date
+        after_close: Whether it is past 15:00 (rolls Thursday over to next week)
+    """
+    days_until_thursday = (3 - today.weekday()) % 7
+    if days_until_thursday == 0 and after_close:  # If Thursday and after market close
+        days_until_thursday = 7
+    return (today + timedelta(days=days_until_thursday)).strftime("%Y-%m-%d")
+
+
+def pick_option(
+    symbol: str,
+    spot: float,
+    side: str,
+    now: Optional[datetime] = None
+) -> Option:
     """
     Select option contract based on symbol, spot price, and side.
     
@@ -195,6 +678,7 @@ def pick_option(symbol: str, spot: float, side: str) -> Option:
         symbol: Base symbol (e.g., "NIFTY")
         spot: Current spot price
         side: "CE" for Call, "PE" for Put
+        now: Current datetime (defaults to datetime.now())
     
     Returns:
         Option object with symbol, strike, expiry, and lot size
@@ -202,30 +686,20 @@ def pick_option(symbol: str, spot: float, side: str) -> Option:
     if side not in ["CE", "PE"]:
         raise ValueError(f"Invalid side: {side}. Must be 'CE' or 'PE'")
     
-    # Calculate ATM strike (rounded to nearest 50 for NIFTY)
-    base_strike = round(spot / 50) * 50
-    
+    # Calculate ATM strike (rounded to nearest STRIKE_STEP for NIFTY, halves round up)
     # For now, use ATM strike (can be extended with offset from config)
-    strike = int(base_strike)
+    strike = (int(spot) + STRIKE_STEP // 2) // STRIKE_STEP * STRIKE_STEP
     
     # Calculate nearest expiry (Thursday for NIFTY weekly options)
     # For simplicity, use next Thursday or current week's Thursday
-    today = datetime.now()
-    days_until_thursday = (3 - today.weekday()) % 7
-    if days_until_thursday == 0 and today.hour >= 15:  # If Thursday and after market close
-        days_until_thursday = 7
-    
-    expiry_date = today + timedelta(days=days_until_thursday)
-    expiry = expiry_date.strftime("%Y-%m-%d")
-    
-    # Default lot size for NIFTY options
-    lot = 75
+    today = now if now is not None else datetime.now()
+    expiry = _weekly_expiry(today.date(), today.hour >= 15)
     
     logger.info(
-        f"Selected option: {symbol} {strike} {side} exp {expiry} (lot={lot})"
+        f"Selected option: {symbol} {strike} {side} exp {expiry} (lot={DEFAULT_LOT_SIZE})"
     )
     
-    return Option(symbol=symbol, strike=strike, expiry=expiry, lot=lot)
+    return Option(symbol=symbol, strike=strike, expiry=expiry, lot=DEFAULT_LOT_SIZE)
 
 
 def compute_lots(acct_risk: float, entry_premium: float) -> int:
@@ -243,20 +717,15 @@ def compute_lots(acct_risk: float, entry_premium: float) -> int:
         logger.warning(f"Invalid entry premium: {entry_premium}")
         return 1
     
-    # Risk per lot = entry premium (assuming 100% loss as worst case)
+    # Risk per lot = entry premium (assuming 100% loss as worst case), minimum 1 lot.
     # Alternatively, could use initial_sl to calculate risk per lot
-    risk_per_lot = entry_premium
-    
-    # Calculate lots based on account risk
-    lots = int(acct_risk / risk_per_lot) if risk_per_lot > 0 else 1
-    
-    # Ensure minimum 1 lot
-    lots = max(1, lots)
+    lots = max(1, int(acct_risk / entry_premium))
     
-    logger.debug(
-        f"Computed lots: {lots} (risk={acct_risk}, premium={entry_premium:.2f}, "
-        f"risk_per_lot={risk_per_lot:.2f})"
-    )
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(
+            "Computed lots: %d (risk=%s, premium=%.2f, risk_per_lot=%.2f)",
+            lots, acct_risk, entry_premium, entry_premium
+        )
     
     return lots
 
@@ -265,24 +734,92 @@ def initial_sl(entry_premium: float) -> float:
     """
     Calculate initial stop loss as 0.65 * entry premium.
     
+    For external callers; the tick paths multiply by INITIAL_SL_RATIO inline.
+    
     Args:
         entry_premium: Entry premium price
     
     Returns:
         Stop loss price (0.65 * entry_premium)
     """
-    sl = 0.65 * entry_premium
-    logger.debug(f"Initial SL: {sl:.2f} (65% of entry {entry_premium:.2f})")
+    sl = INITIAL_SL_RATIO * entry_premium
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Initial SL: %.2f (65%% of entry %.2f)", sl, entry_premium)
     return sl
 
 
+def _trailing_stop(
+    entry: float,
+    cur: float,
+    atr: float,
+    iv: float,
+    swing_low: float,
+    atr_mult: float,
+    iv_adj: float,
+    floor: float
+) -> float:
+    """
+    Numeric core of update_trailing on plain floats (swing_low is NaN when there are no swings).
+    
+    Written with explicit compares so NaN handling matches max()/min() in
+    update_trailing and numba can compile it; see _trailing_stops_jit.
+    """
+    # ATR trail widened by IV
+    trail = (cur - atr * atr_mult) * (1.0 + (iv / 100.0) * iv_adj)
+    # Half ATR below the recent swing low, if that is higher (NaN never compares greater)
+    swing_trail = swing_low - atr * 0.5
+    if swing_trail > trail:
+        trail = swing_trail
+    # Never below the initial SL, never above entry
+    if floor > trail:
+        trail = floor
+    if trail > entry:
+        trail = entry
+    return trail
+
+
+if njit is not None:
+    _trailing_stop_jit = njit(cache=True)(_trailing_stop)
+    
+    @njit(cache=True)
+    def _trailing_stops_jit(entry, cur, atr, iv, swing_min3, atr_mult, iv_adj, out):
+        for i in range(out.shape[0]):
+            out[i] = _trailing_stop_jit(
+                entry[i], cur[i], atr[i], iv[i], swing_min3[i], atr_mult, iv_adj, INITIAL_SL_RATIO * entry[i]
+            )
+else:
+    _trailing_stops_jit = None
+
+
+def _recent_swing_low(swings: Union[list, SwingWindow]) -> float:
+    """Recent swing low used as trailing reference (min of the last 3 swings), or _NO_SWING."""
+    if not swings:
+        return _NO_SWING
+    if isinstance(swings, SwingWindow):
+        return swings.low
+    if len(swings) >= 3:
+        return min(swings[-3], swings[-2], swings[-1])
+    return min(swings)
+
+
+def _log_trailing(final_trail: float, entry_premium: float, cur_premium: float, atr: float, iv: float):
+    """Debug log for a recomputed trailing SL (skipped entirely unless DEBUG is enabled)."""
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(
+            "Trailing SL updated: %.2f (entry=%.2f, current=%.2f, ATR=%.2f, IV=%.2f)",
+            final_trail, entry_premium, cur_premium, atr, iv
+        )
+
+
 def update_trailing(
     context: TradingContext,
     entry_premium: float,
     cur_premium: float,
     atr: float,
-    swings: list,
-    iv: float
+    swings: Union[list, SwingWindow],
+    iv: float,
+    initial_sl_price: Optional[float] = None,
+    trailing: Optional[TrailingConfig] = None
 ) -> float:
     """
     Update trailing stop loss based on context, current premium, ATR, swings, and IV.
@@ -292,50 +829,145 @@ def update_trailing(
         entry_premium: Original entry premium
         cur_premium: Current premium price
         atr: Average True Range
-        swings: List of recent swing highs/lows
+        swings: Recent swing highs/lows (list or SwingWindow)
         iv: Current implied volatility
+        initial_sl_price: Precomputed initial_sl(entry_premium); computed here if omitted
+        trailing: Pre-resolved trailing settings (see TrailingConfig.from_config);
+                  resolved from context.config if omitted
     
     Returns:
         Updated trailing stop loss price
     """
-    # Base trailing: use ATR multiplier
-    atr_multiplier = context.config.get('trailing', {}).get('atr_multiplier', 1.5)
-    base_trail = cur_premium - (atr * atr_multiplier)
-    
-    # Adjust based on IV: higher IV = wider trailing
-    iv_adjustment = context.config.get('trailing', {}).get('iv_adjustment', 0.1)
-    iv_factor = 1.0 + (iv / 100.0) * iv_adjustment
-    adjusted_trail = base_trail * iv_factor
-    
-    # Use swing-based trailing if swings available
-    if swings and len(swings) > 0:
-        # Use recent swing low as trailing reference
-        recent_swing = min(swings[-3:]) if len(swings) >= 3 else min(swings)
-        swing_trail = recent_swing - (atr * 0.5)  # Half ATR below swing
-        
-        # Use the more conservative (higher) trailing stop
-        adjusted_trail = max(adjusted_trail, swing_trail)
+    # ATR multiplier for the base trail, IV adjustment (higher IV = wider trailing)
+    if trailing is None:
+        trailing = TrailingConfig.from_config(context.config)
     
     # Ensure trailing SL never goes below initial SL
-    initial_sl_price = initial_sl(entry_premium)
-    final_trail = max(adjusted_trail, initial_sl_price)
-    
-    # Ensure trailing SL never goes above entry (for long positions)
-    final_trail = min(final_trail, entry_premium)
+    if initial_sl_price is None:
+        initial_sl_price = entry_premium * INITIAL_SL_RATIO
     
-    logger.debug(
-        f"Trailing SL updated: {final_trail:.2f} (entry={entry_premium:.2f}, "
-        f"current={cur_premium:.2f}, ATR={atr:.2f}, IV={iv:.2f})"
+    final_trail = _trailing_stop(
+        entry_premium, cur_premium, atr, iv, _recent_swing_low(swings),
+        trailing.atr_multiplier, trailing.iv_adjustment, initial_sl_price
     )
+    _log_trailing(final_trail, entry_premium, cur_premium, atr, iv)
     
     return final_trail
 
 
+def update_trailing_vec(
+    entry: np.ndarray,
+    cur: np.ndarray,
+    atr: np.ndarray,
+    iv: np.ndarray,
+    swing_min3: np.ndarray,
+    atr_mult: float = 1.5,
+    iv_adj: float = 0.1
+) -> np.ndarray:
+    """
+    Vectorized update_trailing for a book of positions (one array element per position).
+    
+    Runs as a single compiled loop when numba is installed, otherwise as NumPy
+    array expressions.
+    
+    Args:
+        entry: Entry premium per position
+        cur: Current premium per position
+        atr: Average True Range per position
+        iv: Current implied volatility per position
+        swing_min3: Min of the last 3 swings per position (NaN when no swings),
+                    e.g. SwingBook.lows()
+        atr_mult: ATR multiplier (config['trailing']['atr_multiplier'])
+        iv_adj: IV adjustment (config['trailing']['iv_adjustment'])
+    
+    Returns:
+        Array of trailing stop loss prices, same rules as update_trailing
+    """
+    entry = np.asarray(entry, dtype=np.float64)
+    atr = np.asarray(atr, dtype=np.float64)
+    
+    if _trailing_stops_jit is not None:
+        arrays = np.broadcast_arrays(
+            entry, atr,
+            np.asarray(cur, dtype=np.float64),
+            np.asarray(iv, dtype=np.float64),
+            np.asarray(swing_min3, dtype=np.float64),
+        )
+        if arrays[0].ndim == 1:
+            entry, atr, cur, iv, swing_min3 = arrays
+            out = np.empty(entry.shape[0])
+            _trailing_stops_jit(entry, cur, atr, iv, swing_min3, float(atr_mult), float(iv_adj), out)
+            return out
+    
+    adjusted = (cur - atr * atr_mult) * (1.0 + iv * 0.01 * iv_adj)
+    # fmax ignores NaN, so positions without swings keep the ATR/IV trail
+    adjusted = np.fmax(adjusted, swing_min3 - 0.5 * atr)
+    return np.minimum(np.maximum(adjusted, INITIAL_SL_RATIO * entry), entry)
+
+
+@functools.lru_cache(maxsize=64)
+def _parse_hhmm(value: str) -> int:
+    """
+    Parse a time string into an integer HHMM (hour * 100 + minute), cached per distinct string.
+    
+    Accepts "HH:MM" (spaces allowed around the colon) and "HHMM" in 24-hour
+    time, or either followed by AM/PM.
+    
+    Returns:
+        HHMM, or 1500 i.e. 3 PM if the string is not a valid time
+    """
+    match = _HHMM_RE.fullmatch(value) if isinstance(value, str) else None
+    if match is None:
+        return 1500
+    hour = int(match.group(1))
+    minute = int(match.group(2) or match.group(3))
+    meridiem = match.group(4)
+    if meridiem is not None:
+        if not 1 <= hour <= 12:
+            return 1500
+        hour = hour % 12 + (12 if meridiem.upper() == 'PM' else 0)
+    if hour > 23 or minute > 59:
+        return 1500
+    return hour * 100 + minute
+
+
+EXPIRY_EXIT_REASON = "Expiry day exit"
+DEFAULT_EXPIRY_EXIT_TIME = "15:00"
+
+
+def _expiry_exit_hhmm(position_config: Dict[str, Any]) -> int:
+    """Expiry-day exit cutoff (position config 'expiry_exit_time') as HHMM."""
+    exit_time = position_config.get('expiry_exit_time', DEFAULT_EXPIRY_EXIT_TIME)  # Default: 3 PM IST
+    
+    # Almost every config uses the default, which needs no parsing at all
+    return 1500 if exit_time == DEFAULT_EXPIRY_EXIT_TIME else _parse_hhmm(exit_time)
+
+
+def _expiry_exit_qty(now: datetime, position: Position, exit_hhmm: int) -> int:
+    """
+    Quantity to close for the expiry-day time exit, or 0 if no exit is due yet.
+    
+    Shared by time_expiry_exit and manage_trade_tick so the tick path can build
+    its action dict directly without allocating an intermediate Exit.
+    """
+    # Exit if current time is at or after exit time (compared as HHMM integers,
+    # which is exact because the cutoff always falls on a whole minute)
+    if now.hour * 100 + now.minute < exit_hhmm:
+        return 0
+    
+    qty = position.quantity
+    if qty > 0:
+        logger.info(
+            "Expiry day exit triggered at %s (exit_time=%02d:%02d)", now, exit_hhmm // 100, exit_hhmm % 100
+        )
+    return qty
+
+
 def time_expiry_exit(
     now: datetime,
     is_expiry_day: bool,
     premium: float,
-    position: Dict
+    position: Position
 ) -> Optional[Exit]:
     """
     Check if position should be exited due to expiry day timing.
@@ -344,7 +976,7 @@ def time_expiry_exit(
         now: Current datetime
         is_expiry_day: Whether today is expiry day
         premium: Current premium price
-        position: Position dictionary with quantity and other details
+        position: Position with quantity and config
     
     Returns:
         Exit object if exit needed, None otherwise
@@ -352,48 +984,43 @@ def time_expiry_exit(
     if not is_expiry_day:
         return None
     
-    # Exit logic for expiry day
-    config = position.get('config', {})
-    exit_time = config.get('expiry_exit_time', '15:00')  # Default: 3 PM IST
-    
-    try:
-        exit_hour, exit_minute = map(int, exit_time.split(':'))
-        exit_datetime = now.replace(hour=exit_hour, minute=exit_minute, second=0, microsecond=0)
-    except:
-        # Default to 3 PM if parsing fails
-        exit_datetime = now.replace(hour=15, minute=0, second=0, microsecond=0)
-    
-    # Exit if current time is at or after exit time
-    if now >= exit_datetime:
-        qty = position.get('quantity', 0)
-        if qty > 0:
-            logger.info(
-                f"Expiry day exit triggered at {now} (exit_time={exit_time})"
-            )
-            return Exit(
-                reason="Expiry day exit",
-                exit_price=premium,
-                qty=qty,
-                timestamp=now
-            )
+    rules = position.rules
+    exit_hhmm = rules.expiry_exit_hhmm if rules is not None else _expiry_exit_hhmm(position.config)
+    qty = _expiry_exit_qty(now, position, exit_hhmm)
+    if qty <= 0:
+        return None
     
-    return None
+    return Exit(
+        reason=EXPIRY_EXIT_REASON,
+        exit_price=premium,
+        qty=qty,
+        timestamp=now
+    )
 
 
 def manage_trade_tick(
-    position: Dict,
+    position: Position,
     current_premium: float,
     context: TradingContext,
-    current_sl: float
+    current_sl: float,
+    now: Optional[datetime] = None
 ) -> Optional[Tuple[str, Optional[Dict]]]:
     """
     Manage trade on each tick - check for exits or modifications.
     
     Args:
-        position: Position dictionary with entry details
+        position: Position with entry details. The premium at the last trailing
+                  update is stored in position.last_trail_premium; the trail is not
+                  recomputed until premium advances by trailing.min_move_atr
+                  (default TRAIL_MIN_MOVE_ATR) x ATR beyond it. position.initial_sl may
+                  be set when the position is opened; otherwise it is computed and
+                  stored on first use. Likewise position.rules (see TickRules.from_config)
+                  is resolved from context.config and position.config on the first tick
+                  and reused after that, so later config edits do not reach open positions.
         current_premium: Current premium price
         context: TradingContext with market conditions
         current_sl: Current stop loss level
+        now: Tick timestamp (defaults to datetime.now(); pass the tick's own time to avoid a clock read)
     
     Returns:
         Tuple of (action, params) where:
@@ -401,29 +1028,32 @@ def manage_trade_tick(
         - params: Dictionary with exit/modify details, or None
         None if no action needed
     """
-    entry_premium = position.get('entry_premium', 0)
-    quantity = position.get('quantity', 0)
+    entry_premium = position.entry_premium
+    quantity = position.quantity
     
     if quantity <= 0:
         return None
     
     # Check stop loss
     if current_premium <= current_sl:
-        logger.info(f"Stop loss hit: {current_premium:.2f} <= {current_sl:.2f}")
+        logger.info("Stop loss hit: %.2f <= %.2f", current_premium, current_sl)
         return ("exit", {
             "reason": "Stop loss",
             "exit_price": current_premium,
             "qty": quantity
         })
     
+    # Config lookups happen once per position, not once per tick
+    rules = position.rules
+    if rules is None:
+        rules = position.rules = TickRules.from_config(context.config, position.config)
+    
     # Check take profit (if configured)
-    tp_config = context.config.get('take_profit', {})
-    if tp_config:
-        tp_points = tp_config.get('points', 54)  # Default from config
-        tp_price = entry_premium + tp_points
+    if rules.take_profit_points is not None:
+        tp_price = entry_premium + rules.take_profit_points
         
         if current_premium >= tp_price:
-            logger.info(f"Take profit hit: {current_premium:.2f} >= {tp_price:.2f}")
+            logger.info("Take profit hit: %.2f >= %.2f", current_premium, tp_price)
             return ("exit", {
                 "reason": "Take profit",
                 "exit_price": current_premium,
@@ -431,39 +1061,124 @@ def manage_trade_tick(
             })
     
     # Check trailing stop update
-    if 'trailing' in context.config:
-        # Calculate new trailing SL
-        swings = context.swings if context.swings else []
-        new_trail_sl = update_trailing(
-            context=context,
-            entry_premium=entry_premium,
-            cur_premium=current_premium,
-            atr=context.atr,
-            swings=swings,
-            iv=context.iv
-        )
-        
-        # If new trailing SL is higher than current, update it
-        if new_trail_sl > current_sl:
-            logger.info(f"Trailing SL update: {current_sl:.2f} -> {new_trail_sl:.2f}")
-            return ("modify_sl", {
-                "new_sl": new_trail_sl,
-                "reason": "Trailing stop update"
-            })
+    trailing = rules.trailing
+    if trailing.enabled:
+        # After a trail update, skip the recompute until premium has moved up meaningfully
+        last_trail_premium = position.last_trail_premium
+        min_move = trailing.min_move_atr * context.atr
+        if last_trail_premium is None or current_premium - last_trail_premium >= min_move:
+            # Initial SL is fixed for the life of the position: compute once and keep it
+            initial_sl_price = position.initial_sl
+            if initial_sl_price is None:
+                initial_sl_price = position.initial_sl = entry_premium * INITIAL_SL_RATIO
+            
+            # Calculate new trailing SL (update_trailing's core, called directly:
+            # everything it would resolve is already at hand here)
+            atr = context.atr
+            iv = context.iv
+            new_trail_sl = _trailing_stop(
+                entry_premium, current_premium, atr, iv, _recent_swing_low(context.swings),
+                trailing.atr_multiplier, trailing.iv_adjustment, initial_sl_price
+            )
+            _log_trailing(new_trail_sl, entry_premium, current_premium, atr, iv)
+            
+            # If new trailing SL is higher than current, update it
+            if new_trail_sl > current_sl:
+                position.last_trail_premium = current_premium
+                logger.info("Trailing SL update: %.2f -> %.2f", current_sl, new_trail_sl)
+                return ("modify_sl", {
+                    "new_sl": new_trail_sl,
+                    "reason": "Trailing stop update"
+                })
     
     # Check expiry day exit
     if context.is_expiry_day:
-        exit_signal = time_expiry_exit(
-            now=datetime.now(),
-            is_expiry_day=True,
-            premium=current_premium,
-            position=position
+        expiry_qty = _expiry_exit_qty(
+            now if now is not None else datetime.now(), position, rules.expiry_exit_hhmm
         )
-        if exit_signal:
+        if expiry_qty > 0:
             return ("exit", {
-                "reason": exit_signal.reason,
-                "exit_price": exit_signal.exit_price,
-                "qty": exit_signal.qty
+                "reason": EXPIRY_EXIT_REASON,
+                "exit_price": current_premium,
+                "qty": expiry_qty
             })
     
     return None
+
+
+if njit is not None:
+    @njit(parallel=True, cache=True)
+    def _exit_codes_parallel(premium, entry, stop, quantity, tp_points, out):
+        # out[i]: 0 = no exit, 1 = stop loss, 2 = take profit (tp_points NaN = not configured)
+        for i in prange(out.shape[0]):
+            code = 0
+            if quantity[i] > 0:
+                if premium[i] <= stop[i]:
+                    code = 1
+                elif premium[i] >= entry[i] + tp_points:
+                    code = 2
+            out[i] = code
+else:
+    _exit_codes_parallel = None
+
+
+def manage_ticks_batch(
+    snapshots: np.ndarray,
+    entry_premium: np.ndarray,
+    stop_loss: np.ndarray,
+    quantity: np.ndarray,
+    take_profit_points: Optional[float] = None,
+    parallel: bool = False
+) -> List[Tuple[int, str, Dict]]:
+    """
+    Stop loss / take profit checks of manage_trade_tick for a whole book in one pass.
+    
+    Row i of every argument describes position i. Both checks are evaluated as
+    array masks and only the positions that hit one are turned into actions.
+    
+    Args:
+        snapshots: SNAPSHOT_DTYPE array with the latest tick per position
+        entry_premium: Entry premium per position
+        stop_loss: Current stop loss per position
+        quantity: Open quantity per position (0 for empty rows)
+        take_profit_points: config['take_profit']['points'], or None if take profit is not configured
+        parallel: Split the checks across cores with numba (ignored if numba is not installed).
+                  Only pays off for very large books on multi-core hosts; on a single
+                  core the NumPy masks are faster.
+    
+    Returns:
+        List of (position index, "exit", params) with the same params as manage_trade_tick
+    """
+    premium = snapshots['premium']
+    quantity = np.asarray(quantity)
+    
+    if parallel and _exit_codes_parallel is not None:
+        codes = np.empty(premium.shape[0], dtype=np.uint8)
+        _exit_codes_parallel(
+            np.ascontiguousarray(premium),
+            np.ascontiguousarray(entry_premium, dtype=np.float64),
+            np.ascontiguousarray(stop_loss, dtype=np.float64),
+            np.ascontiguousarray(quantity, dtype=np.int64),
+            np.nan if take_profit_points is None else float(take_profit_points),
+            codes
+        )
+        stop_hit = codes == 1
+        target_hit = codes == 2
+    else:
+        is_open = quantity > 0
+        stop_hit = is_open & (premium <= stop_loss)
+        if take_profit_points is not None:
+            target_hit = is_open & ~stop_hit & (premium >= entry_premium + take_profit_points)
+        else:
+            target_hit = np.zeros_like(stop_hit)
+    
+    actions = []
+    for i in np.flatnonzero(stop_hit | target_hit).tolist():
+        reason = "Stop loss" if stop_hit[i] else "Take profit"
+        logger.info("%s hit on position %d: premium %.2f", reason, i, premium[i])
+        actions.append((i, "exit", {
+            "reason": reason,
+            "exit_price": float(premium[i]),
+            "qty": int(quantity[i])
+        }))
+    return actions
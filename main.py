@@ -29,6 +29,9 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
+# Directories already created/verified in this process (skips mkdir on reruns)
+_ENSURED_DIRS: set = set()
+
 
 def initialize_application():
     """
@@ -47,7 +50,10 @@ def initialize_application():
     ]
     
     for directory in required_dirs:
+        if directory in _ENSURED_DIRS:
+            continue
         Path(directory).mkdir(parents=True, exist_ok=True)
+        _ENSURED_DIRS.add(directory)
         logger.debug(f"Verified directory: {directory}")
     
     # Check configuration files
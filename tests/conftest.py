@@ -0,0 +1,8 @@
+"""
+Make the repository root importable (engine, dashboard, utils) when running pytest.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
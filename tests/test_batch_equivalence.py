@@ -0,0 +1,149 @@
+"""
+Batch/vectorized position paths must agree with the per-position Python code.
+
+manage_ticks_batch, update_trailing_vec, SwingBook and PortfolioState reimplement
+manage_trade_tick, update_trailing, the swing window and PositionMonitor._tick
+for whole books. Each test runs both on random positions and ticks, with the
+numba kernels enabled (when numba is installed) and disabled.
+"""
+
+import numpy as np
+import pytest
+
+from engine import trade_management as tm
+from engine.position_monitor import PortfolioState, PositionMonitor, PositionRules
+
+
+N_POSITIONS = 400
+
+
+@pytest.fixture(params=["numba", "numpy"])
+def jit_mode(request, monkeypatch):
+    """Run a test with the numba kernels, and again with the NumPy fallbacks."""
+    if request.param == "numba":
+        if tm.njit is None:
+            pytest.skip("numba not installed")
+    else:
+        monkeypatch.setattr(tm, "_trailing_stops_jit", None)
+        monkeypatch.setattr(tm, "_exit_codes_parallel", None)
+    return request.param
+
+
+def _context(atr=10.0, iv=20.0, swings=(), config=None):
+    return tm.TradingContext(
+        spot=24000.0, iv=iv, atr=atr, swings=list(swings), is_expiry_day=False,
+        account_risk=10000.0, spread=1.0, gap_pct=0.0, config=config or {},
+    )
+
+
+@pytest.mark.parametrize("take_profit_points", [None, 40.0])
+@pytest.mark.parametrize("parallel", [False, True])
+def test_manage_ticks_batch_matches_manage_trade_tick(jit_mode, take_profit_points, parallel):
+    rng = np.random.default_rng(7)
+    entry = rng.uniform(50, 300, N_POSITIONS)
+    stop = entry * rng.uniform(0.5, 0.95, N_POSITIONS)
+    quantity = rng.choice([0, 75, 150, 300], N_POSITIONS)
+    snapshots = np.zeros(N_POSITIONS, dtype=tm.SNAPSHOT_DTYPE)
+    snapshots['premium'] = entry * rng.uniform(0.4, 1.6, N_POSITIONS)
+
+    config = {} if take_profit_points is None else {'take_profit': {'points': take_profit_points}}
+    context = _context(config=config)
+    expected = []
+    for i in range(N_POSITIONS):
+        position = tm.Position(entry_premium=float(entry[i]), quantity=int(quantity[i]))
+        action = tm.manage_trade_tick(position, float(snapshots['premium'][i]), context, float(stop[i]))
+        if action is not None:
+            expected.append((i, action[0], action[1]))
+
+    actual = tm.manage_ticks_batch(
+        snapshots, entry, stop, quantity, take_profit_points=take_profit_points, parallel=parallel
+    )
+    assert actual == expected
+
+
+def test_update_trailing_vec_matches_update_trailing(jit_mode):
+    rng = np.random.default_rng(11)
+    entry = rng.uniform(50, 300, N_POSITIONS)
+    cur = entry * rng.uniform(0.5, 2.0, N_POSITIONS)
+    atr = rng.uniform(1, 30, N_POSITIONS)
+    iv = rng.uniform(8, 60, N_POSITIONS)
+    book = tm.SwingBook(N_POSITIONS)
+    swings = []
+    for i in range(N_POSITIONS):
+        history = list(cur[i] * rng.uniform(0.6, 1.1, rng.integers(0, 6)))
+        for swing in history:
+            book.push(i, swing)
+        swings.append(history)
+
+    trailing = tm.TrailingConfig(enabled=True, atr_multiplier=1.2, iv_adjustment=0.15)
+    context = _context()
+    expected = np.array([
+        tm.update_trailing(context, entry[i], cur[i], atr[i], swings[i], iv[i], trailing=trailing)
+        for i in range(N_POSITIONS)
+    ])
+    actual = tm.update_trailing_vec(
+        entry, cur, atr, iv, book.lows(),
+        atr_mult=trailing.atr_multiplier, iv_adj=trailing.iv_adjustment
+    )
+    np.testing.assert_allclose(actual, expected, rtol=1e-12)
+
+
+def test_swing_book_matches_swing_window():
+    rng = np.random.default_rng(3)
+    book = tm.SwingBook(N_POSITIONS)
+    windows = [tm.SwingWindow() for _ in range(N_POSITIONS)]
+    histories = [[] for _ in range(N_POSITIONS)]
+    for _ in range(10):
+        rows = np.flatnonzero(rng.random(N_POSITIONS) < 0.5)
+        values = rng.uniform(50, 300, rows.size)
+        book.push(rows, values)
+        for row, value in zip(rows.tolist(), values.tolist()):
+            windows[row].append(value)
+            histories[row].append(value)
+        closed = np.flatnonzero(rng.random(N_POSITIONS) < 0.05)
+        book.reset(closed)
+        for row in closed.tolist():
+            windows[row] = tm.SwingWindow()
+            histories[row] = []
+
+        # NaN (_NO_SWING) for positions without swings on every path
+        expected = np.array([tm._recent_swing_low(history) for history in histories])
+        from_windows = np.array([tm._recent_swing_low(window) for window in windows])
+        np.testing.assert_array_equal(from_windows, expected)
+        np.testing.assert_array_equal(book.lows(), expected)
+
+
+class _QuoteBroker:
+    """Minimal broker returning a settable LTP from get_market_quote."""
+
+    def __init__(self):
+        self.ltp = 0.0
+
+    def get_market_quote(self, params):
+        return {"data": {"fetched": [{"ltp": self.ltp}]}}
+
+
+def test_portfolio_state_matches_position_monitor():
+    rng = np.random.default_rng(5)
+    rules = PositionRules(sl_points=15, trail_points=10, book1_points=20, book2_points=40, book1_ratio=0.5)
+    entry = rng.uniform(80, 200, N_POSITIONS).round(1)
+    quantity = rng.choice([75, 150, 225], N_POSITIONS)
+    broker = _QuoteBroker()
+    monitors = [
+        PositionMonitor(broker, "0", "NFO", entry[i], quantity[i], rules) for i in range(N_POSITIONS)
+    ]
+    book = PortfolioState(entry, quantity, rules)
+
+    ltp = entry.copy()
+    for _ in range(30):
+        ltp = ltp + rng.normal(0, 6, N_POSITIONS).round(1)
+        book.tick(ltp)
+        for i, monitor in enumerate(monitors):
+            if monitor.closed:
+                continue
+            broker.ltp = float(ltp[i])
+            monitor._tick()
+
+        for name in ('stop_loss', 'trail_anchor', 'remaining_qty', 'book1_done', 'book2_done', 'closed'):
+            expected = np.array([getattr(monitor, name) for monitor in monitors])
+            np.testing.assert_array_equal(getattr(book, name), expected, err_msg=name)
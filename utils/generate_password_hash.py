@@ -1,9 +1,24 @@
 """
 Utility script to generate password hash for streamlit-authenticator
+
+For scripted setup, pass the password through the PASSWORD_TO_HASH environment
+variable or on stdin (piped, or with "-" as the only argument), e.g.
+    printf '%s' "$PW" | python utils/generate_password_hash.py -
+The password is never accepted as a command-line argument, where it would
+show up in shell history and process listings.
 """
 
 import streamlit_authenticator as stauth
 import getpass
+import os
+import secrets
+import sys
+
+# Environment variable read for non-interactive use
+PASSWORD_ENV_VAR = "PASSWORD_TO_HASH"
+
+# Shared Hasher, created on first use (hash() keeps no per-call state)
+_HASHER = None
 
 
 def generate_password_hash(password: str = None) -> str:
@@ -25,12 +40,30 @@ def generate_password_hash(password: str = None) -> str:
             return None
     
     # New API: Hasher() with no args, then call hash() method
-    hasher = stauth.Hasher()
-    hashed = hasher.hash(password)
+    global _HASHER
+    if _HASHER is None:
+        _HASHER = stauth.Hasher()
+    hashed = _HASHER.hash(password)
     
     return hashed
 
 
+def read_scripted_password():
+    """
+    Password for non-interactive use, without prompting.
+    
+    Returns:
+        Password from PASSWORD_TO_HASH, else the first line of stdin when it is
+        piped (or "-" was passed), else None to fall back to the prompts
+    """
+    password = os.environ.get(PASSWORD_ENV_VAR)
+    if password:
+        return password
+    if sys.argv[1:] == ["-"] or not sys.stdin.isatty():
+        return sys.stdin.readline().rstrip("\r\n")
+    return None
+
+
 def generate_random_key() -> str:
     """
     Generate random key for cookie authentication.
@@ -38,7 +71,6 @@ def generate_random_key() -> str:
     Returns:
         Random hex string
     """
-    import secrets
     return secrets.token_hex(16)
 
 
@@ -51,7 +83,16 @@ if __name__ == "__main__":
     # Generate password hash
     print("Step 1: Generate Password Hash")
     print("-" * 50)
-    password_hash = generate_password_hash()
+    if sys.argv[1:] not in ([], ["-"]):
+        print(f"❌ Pass the password on stdin (\"-\") or via {PASSWORD_ENV_VAR}, not as an argument")
+        sys.exit(2)
+    
+    # Scripted setup supplies the password via environment or stdin (skips the prompts)
+    password = read_scripted_password()
+    if password == "":
+        print("❌ Empty password!")
+        sys.exit(1)
+    password_hash = generate_password_hash(password)
     
     if password_hash:
         print(f"\n✅ Password Hash Generated:")